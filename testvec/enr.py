@@ -70,9 +70,7 @@ class ENR:
         del self._kv[k]
 
     def node_addr(self):
-        pubkey = coincurve.PublicKey(self.get('secp256k1'))
-        pubkey = pubkey.format(compressed=False)
-        return sha3.keccak_256(pubkey[1:]).digest()
+        return pubkey_to_node_addr(self.get('secp256k1'))
 
     def sign(self, privkey):
         self._seq = self._seq + 1
@@ -149,6 +147,90 @@ class ENR:
         kv = {k: self.get(k) for k in sorted(self._kv.keys())}
         return '<ENR seq={} {}>'.format(self.seq, kv)
 
+class RecordStore:
+    """
+    RecordStore holds the latest known record of each node, keyed by the compressed
+    secp256k1 public key. Updates are pre-checked using peek, so copies of records
+    which aren't newer than the stored one are dropped without decoding them fully
+    or verifying their signature.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self.verified = 0  # updates which needed signature verification
+        self.skipped = 0   # updates dropped by the seq pre-check
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, pubkey):
+        return self._records.get(pubkey)
+
+    def records(self):
+        return self._records.values()
+
+    def update(self, data):
+        """Adds an encoded record. Returns the record if it was stored, None if stale."""
+        seq, pubkey = peek(data)
+        if pubkey is None:
+            raise ValueError('record has no secp256k1 key')
+        known = self._records.get(pubkey)
+        if known is not None and known.seq >= seq:
+            self.skipped += 1
+            return None
+        self.verified += 1
+        e = ENR.from_rlp(data)
+        # from_rlp keeps the last of duplicate keys, peek the first one.
+        if e.get('secp256k1') != pubkey:
+            raise ValueError('record has multiple secp256k1 keys')
+        self._records[pubkey] = e
+        return e
+
+def peek(data):
+    """
+    Returns the seq and secp256k1 public key of an encoded record without decoding
+    all of it or verifying the signature. The result can't be trusted until the record
+    is decoded by ENR.from_rlp. The public key is None if the record doesn't have one.
+    """
+    assert(len(data) <= MAXSIZE) # check max size
+    is_list, pos, end = _rlp_item(data, 0)
+    if not is_list or end != len(data):
+        raise ValueError('record is not an RLP list')
+    _, _, pos = _rlp_item(data, pos) # skip signature
+    _, start, pos = _rlp_item(data, pos)
+    seq = eth_utils.big_endian_to_int(data[start:pos])
+    while pos < end:
+        _, kstart, kend = _rlp_item(data, pos)
+        _, vstart, pos = _rlp_item(data, kend)
+        if data[kstart:kend] == b'secp256k1':
+            return seq, data[vstart:pos]
+    return seq, None
+
+def pubkey_to_node_addr(pubkey):
+    pubkey = coincurve.PublicKey(pubkey).format(compressed=False)
+    return sha3.keccak_256(pubkey[1:]).digest()
+
+def _rlp_item(data, pos):
+    # Returns (is_list, content start, content end) of the RLP item at pos.
+    if pos >= len(data):
+        raise ValueError('unexpected end of RLP input')
+    b = data[pos]
+    if b < 0x80:
+        is_list, start, size = False, pos, 1
+    elif b < 0xb8:
+        is_list, start, size = False, pos + 1, b - 0x80
+    elif b < 0xc0:
+        start = pos + 1 + b - 0xb7
+        is_list, size = False, eth_utils.big_endian_to_int(data[pos+1:start])
+    elif b < 0xf8:
+        is_list, start, size = True, pos + 1, b - 0xc0
+    else:
+        start = pos + 1 + b - 0xf7
+        is_list, size = True, eth_utils.big_endian_to_int(data[pos+1:start])
+    if start + size > len(data):
+        raise ValueError('RLP item exceeds input size')
+    return is_list, start, start + size
+
 def _signature_to_der(sig):
     csig = coincurve.ecdsa.deserialize_compact(sig)
     return coincurve.ecdsa.cdata_to_der(csig)
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 
-from .enr import ENR
+from .enr import ENR, RecordStore, peek, pubkey_to_node_addr
 
 import coincurve
+import pytest
+import rlp
+import sha3
 
 privkey = coincurve.PrivateKey.from_hex('b71c71a67e1177ad4e901695e1b4b9ee17ae16c6668d313eac2f96dbcda3f291')
+privkey2 = coincurve.PrivateKey.from_hex('8a1f9a8f95be41cd7ccb6168179afb4504aefe388d1e14474d32c45c72ce7b7a')
 
 def test_encode_decode():
     e = ENR().set('ip', '127.0.0.1').set('udp', 30303)
@@ -28,3 +32,56 @@ def test_text():
 #     r = ENR.from_rlp(enc)
 #     print('From Go:')
 #     print(r)
+
+def test_peek():
+    e = ENR().set('ip', '127.0.0.1').set('udp', 30303).sign(privkey)
+    seq, pubkey = peek(e.encode())
+    assert(seq == e.seq)
+    assert(pubkey == e.get('secp256k1'))
+    assert(pubkey_to_node_addr(pubkey) == e.node_addr())
+
+def test_peek_invalid():
+    assert(peek(rlp.encode([b'\x00' * 64, 7, b'id', b'v4'])) == (7, None))
+    enc = ENR().set('ip', '127.0.0.1').sign(privkey).encode()
+    with pytest.raises(ValueError):
+        peek(enc[:-1])
+    with pytest.raises(ValueError):
+        peek(enc + b'\x00')
+
+def test_store_update():
+    store = RecordStore()
+    e = ENR().set('ip', '127.0.0.1').sign(privkey)
+    old = e.encode()
+    assert(store.update(old) is not None)
+    # Duplicates and older records are dropped before verification.
+    assert(store.update(old) is None)
+    e.set('udp', 30303).sign(privkey)
+    assert(store.update(e.encode()).seq == e.seq)
+    assert(store.update(old) is None)
+    assert(len(store) == 1)
+    assert(store.verified == 2 and store.skipped == 2)
+    # Records of other nodes are kept separately.
+    e2 = ENR().set('ip', '127.0.0.2').sign(privkey2)
+    assert(store.update(e2.encode()) is not None)
+    assert(len(store) == 2)
+    assert(store.get(e.get('secp256k1')).seq == e.seq)
+    assert(store.get(e2.get('secp256k1')).get('ip') == '127.0.0.2')
+
+def test_store_update_invalid():
+    store = RecordStore()
+    with pytest.raises(ValueError):
+        store.update(rlp.encode([b'\x00' * 64, 1, b'id', b'v4']))
+    assert(store.verified == 0)
+
+    # A record listing two keys must not replace the record of either key.
+    e = ENR(4).set('ip', '127.0.0.1').sign(privkey2)
+    store.update(e.encode())
+    pub1 = privkey.public_key.format(compressed=True)
+    pub2 = privkey2.public_key.format(compressed=True)
+    content = [2, b'id', b'v4', b'secp256k1', pub1, b'secp256k1', pub2]
+    sigdata = sha3.keccak_256(rlp.encode(content)).digest()
+    sig = privkey2.sign_recoverable(sigdata, hasher=None)[0:64]
+    with pytest.raises(ValueError):
+        store.update(rlp.encode([sig] + content))
+    assert(store.get(pub1) is None)
+    assert(store.get(pub2).seq == e.seq)